@@ -7,6 +7,7 @@ setup(
     package_dir={"": "src"},
     install_requires=[
         "tiktoken",
+        "pathspec>=1.0",
     ],
     entry_points={
         "console_scripts": [
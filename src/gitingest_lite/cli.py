@@ -4,6 +4,7 @@ import click
 import re
 
 from gitingest_lite.constant import MAX_FILE_SIZE
+from gitingest_lite.ingest import ingest
 
 from .encoding import setup_encoding
 
@@ -65,11 +66,19 @@ def get_project_name(source: str) -> str:
 )
 @click.option(
     "--exclude-pattern", "-e", multiple=True,
-    help="Patterns to exclude"
+    help="Patterns to exclude, in .gitignore syntax relative to the source directory ('*' does not match '/', use '**')"
 )
 @click.option(
     "--include-pattern", "-i", multiple=True,
-    help="Patterns to include"
+    help="Patterns to include, in .gitignore syntax relative to the source directory ('*' does not match '/', use '**')"
+)
+@click.option(
+    "--tokens/--no-tokens", "estimate_tokens", default=True,
+    help="Report an estimated token count (~N, from the output size), or leave it out"
+)
+@click.option(
+    "--exact-tokens", is_flag=True, default=False,
+    help="Count tokens exactly with tiktoken (slower on large outputs)"
 )
 def main(
     source: str,
@@ -77,13 +86,13 @@ def main(
     max_size: int,
     exclude_pattern: tuple[str, ...],
     include_pattern: tuple[str, ...],
+    estimate_tokens: bool,
+    exact_tokens: bool,
 ) -> None:
     """Analyze a directory and create a text dump of its contents."""
     version = "0.1.0"
     print(f"Running gitingest_lite as a script...{version}")
     try:
-        from gitingest_lite.ingest import ingest
-
         # Resolve the source path
         source = str(pathlib.Path(source).resolve())
 
@@ -104,25 +113,21 @@ def main(
         else:
             output = str(pathlib.Path(output).resolve())
 
-        # Call ingest function
+        # Call ingest function, the output file is written below with the summary included
         summary, tree, content = ingest(
             source,
             max_file_size=max_size,
             include_patterns=include_patterns,
             exclude_patterns=exclude_patterns,
-            output=output
+            estimate_tokens=estimate_tokens,
+            exact_tokens=exact_tokens,
         )
 
         # Write output with explicit UTF-8 encoding
+        # Write the pieces one after another to avoid building another full copy of the digest
         with open(output, 'w', encoding='utf-8', errors='replace') as f:
-            if isinstance(summary, bytes):
-                summary = summary.decode('utf-8', errors='replace')
-            if isinstance(tree, bytes):
-                tree = tree.decode('utf-8', errors='replace')
-            if isinstance(content, bytes):
-                content = content.decode('utf-8', errors='replace')
-
-            f.write(f"{summary}\n\n{tree}\n\n{content}")
+            for part in (summary, "\n\n", tree, "\n\n", content):
+                f.write(part)
 
         click.echo(f"\n✅ Analysis complete! Output written to: {output}")
         click.echo("\n📊 Summary:")
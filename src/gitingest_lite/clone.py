@@ -1,7 +1,16 @@
 import asyncio
+import os
+import shutil
+import time
 from dataclasses import dataclass
+from urllib.parse import urlparse
 
-from gitingest_lite.constant import CLONE_TIMEOUT
+try:
+    import fcntl
+except ImportError:  # Windows: mirror updates are not locked
+    fcntl = None
+
+from gitingest_lite.constant import CLONE_TIMEOUT, MIRROR_CACHE_DIR, MIRROR_TIMEOUT, MIRROR_TTL
 from gitingest_lite.utils import AsyncTimeoutError, async_timeout
 
 @dataclass
@@ -10,13 +19,18 @@ class CloneConfig:
     local_path: str
     commit: str | None = None
     branch: str | None = None
+    sparse_patterns: list[str] | None = None
+    subpath: str = "/"
+    reference: str | None = None
 
 
-@async_timeout(CLONE_TIMEOUT)
 async def clone_repo(config: CloneConfig) -> tuple[bytes, bytes]:
     """
     Clones a repository to a local path based on the provided query parameters.
 
+    Unless a reference is given, the clone borrows objects from the repository's mirror when the mirror cache
+    is enabled, see update_mirror. Updating the mirror is not counted against the clone timeout.
+
     Parameters
     ----------
     config : CloneConfig
@@ -25,6 +39,10 @@ async def clone_repo(config: CloneConfig) -> tuple[bytes, bytes]:
             - local_path (str): The local path to clone the repository to.
             - commit (Optional[str]): The specific commit hash to checkout.
             - branch (Optional[str]): The branch to clone. Defaults to 'main' or 'master' if not provided.
+            - sparse_patterns (Optional[List[str]]): Patterns of the files to check out. All files if not provided.
+            - subpath (str): The directory the patterns are relative to. Defaults to the repository root.
+            - reference (Optional[str]): A local mirror to borrow objects from instead of downloading them.
+              Defaults to the cached mirror of the repository, if any.
 
     Returns
     -------
@@ -40,30 +58,50 @@ async def clone_repo(config: CloneConfig) -> tuple[bytes, bytes]:
     AsyncTimeoutError
         If the cloning process exceeds the specified timeout.
     """
-    # Extract and validate query parameters
-    url: str = config.url
-    local_path: str = config.local_path
-    commit: str | None = config.commit
-    branch: str | None = config.branch
-
-    if not url:
+    if not config.url:
         raise ValueError("The 'url' parameter is required.")
 
-    if not local_path:
+    if not config.local_path:
         raise ValueError("The 'local_path' parameter is required.")
 
-    # Check if the repository exists
-    if not await _check_repo_exists(url):
+    # Check if the repository exists, once for both the mirror and the clone
+    if not await _check_repo_exists(config.url):
         raise ValueError("Repository not found, make sure it is public")
 
+    reference = config.reference or await update_mirror(config.url)
+    return await _clone(config, reference)
+
+
+@async_timeout(CLONE_TIMEOUT)
+async def _clone(config: CloneConfig, reference: str | None) -> tuple[bytes, bytes]:
+    """Runs the git commands of clone_repo, with the mirror to borrow objects from, if any."""
+    url: str = config.url
+    local_path: str = config.local_path
+    commit: str | None = config.commit
+    branch: str | None = config.branch
+    sparse_patterns: list[str] | None = config.sparse_patterns
+    subpath: str = config.subpath
+
+    # Partial clone: blobs are only downloaded for the files that end up checked out
+    clone_args = ["--filter=blob:none"]
+    if sparse_patterns:
+        clone_args.append("--no-checkout")
+    if reference:
+        # Objects already in the mirror are not downloaded again. --dissociate copies the borrowed objects
+        # once the clone is done, so a later update of the mirror cannot remove objects the clone relies on.
+        clone_args.extend(["--reference", reference, "--dissociate"])
+
     try:
         print(f"Cloning repository {url} to {local_path}")
         if commit:
             # Scenario 1: Clone and checkout a specific commit
             # Clone the repository without depth to ensure full history for checkout
-            clone_cmd = ["git", "clone", "--single-branch", url, local_path]
+            clone_cmd = ["git", "clone", *clone_args, "--single-branch", url, local_path]
             await _run_git_command(*clone_cmd)
 
+            if sparse_patterns:
+                await _set_sparse_checkout(local_path, sparse_patterns, subpath)
+
             # Checkout the specific commit
             checkout_cmd = ["git", "-C", local_path, "checkout", commit]
             return await _run_git_command(*checkout_cmd)
@@ -71,17 +109,110 @@ async def clone_repo(config: CloneConfig) -> tuple[bytes, bytes]:
         if branch and branch.lower() not in ("main", "master"):
 
             # Scenario 2: Clone a specific branch with shallow depth
-            clone_cmd = ["git", "clone", "--depth=1", "--single-branch", "--branch", branch, url, local_path]
+            clone_cmd = ["git", "clone", "--depth=1", *clone_args, "--single-branch", "--branch", branch, url, local_path]
+        else:
+            # Scenario 3: Clone the default branch with shallow depth
+            clone_cmd = ["git", "clone", "--depth=1", *clone_args, "--single-branch", url, local_path]
+
+        if not sparse_patterns:
             return await _run_git_command(*clone_cmd)
 
-        # Scenario 3: Clone the default branch with shallow depth
-        clone_cmd = ["git", "clone", "--depth=1", "--single-branch", url, local_path]
-        return await _run_git_command(*clone_cmd)
+        await _run_git_command(*clone_cmd)
+        await _set_sparse_checkout(local_path, sparse_patterns, subpath)
+        checkout_cmd = ["git", "-C", local_path, "checkout"]
+        return await _run_git_command(*checkout_cmd)
 
     except (RuntimeError, asyncio.TimeoutError, AsyncTimeoutError):
         raise  # Re-raise the exception
 
 
+async def update_mirror(url: str) -> str | None:
+    """
+    Creates or refreshes the bare mirror of a repository in the mirror cache directory.
+
+    The mirror is fetched again once it is older than ``MIRROR_TTL`` seconds. Concurrent updates of the
+    same mirror are serialized with a lock file where ``fcntl`` is available. An update taking longer than
+    ``MIRROR_TIMEOUT`` seconds is abandoned. The repository is expected to exist, clone_repo checks it first.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the repository.
+
+    Returns
+    -------
+    str | None
+        The path of the mirror, or None if the cache is disabled, the URL has no safe mirror path
+        or the mirror could not be updated.
+    """
+    if not MIRROR_CACHE_DIR:
+        return None
+
+    mirror_path = _mirror_path(url)
+    if mirror_path is None:
+        print(f"Not mirroring {url}: its path cannot be used as a cache directory")
+        return None
+    os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+
+    with open(mirror_path + ".lock", "w") as lock_file:
+        if fcntl is not None:
+            # Waiting for another process to finish its update blocks, so it must not run on the event loop.
+            # The lock is held until the update is done and released when the file is closed.
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+
+        try:
+            await _fetch_mirror(url, mirror_path)
+        except (RuntimeError, OSError, AsyncTimeoutError) as e:
+            print(f"Could not update the mirror of {url}: {e}")
+            return None
+
+    return mirror_path
+
+
+def _mirror_path(url: str) -> str | None:
+    """
+    Returns the path of a repository's mirror in the cache directory, keyed by host and repository path.
+
+    Returns None for URLs whose path segments could point outside the cache directory (empty, ``.``
+    or ``..`` segments, or path separators) and for URLs with an invalid port.
+    """
+    parsed_url = urlparse(url)
+    try:
+        host = (parsed_url.hostname or "localhost") + (f"_{parsed_url.port}" if parsed_url.port else "")
+    except ValueError:
+        return None
+
+    segments = parsed_url.path.strip("/").removesuffix(".git").split("/")
+    if any(segment in ("", ".", "..") or "\\" in segment for segment in segments):
+        return None
+
+    return os.path.join(os.path.abspath(os.path.expanduser(MIRROR_CACHE_DIR)), host, *segments) + ".git"
+
+
+@async_timeout(MIRROR_TIMEOUT)
+async def _fetch_mirror(url: str, mirror_path: str) -> None:
+    """
+    Clones the mirror if it is missing, or fetches it again if it is older than ``MIRROR_TTL`` seconds.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the repository.
+    mirror_path : str
+        The path of the bare mirror.
+    """
+    if not os.path.isdir(mirror_path):
+        # Clone next to the mirror and move it in place, an interrupted clone never looks complete
+        tmp_path = mirror_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        await _run_git_command("git", "clone", "--mirror", url, tmp_path)
+        os.replace(tmp_path, mirror_path)
+    elif time.time() - os.path.getmtime(mirror_path) > MIRROR_TTL:
+        await _run_git_command("git", "-C", mirror_path, "remote", "update", "--prune")
+        os.utime(mirror_path)
+
+
+@async_timeout(CLONE_TIMEOUT)
 async def _check_repo_exists(url: str) -> bool:
     """
     Check if a repository exists at the given URL using an HTTP HEAD request.
@@ -111,10 +242,48 @@ async def _check_repo_exists(url: str) -> bool:
     return "HTTP/1.1 404" not in stdout_str and "HTTP/2 404" not in stdout_str
 
 
+async def _set_sparse_checkout(local_path: str, patterns: list[str], subpath: str = "/") -> tuple[bytes, bytes]:
+    """
+    Restricts the working tree of a clone made with --no-checkout to the given patterns.
+
+    Sparse patterns are anchored at the repository root, while include patterns are matched relative
+    to the subpath, so patterns containing a slash are prefixed with it. Patterns without a slash match
+    at any depth either way. Non-cone patterns need git 2.35 or newer; if the command fails, the whole
+    tree is checked out instead.
+
+    Parameters
+    ----------
+    local_path : str
+        The local path of the cloned repository.
+    patterns : List[str]
+        Gitignore-style patterns of the files to check out.
+    subpath : str
+        The directory the patterns are relative to, "/" for the repository root.
+
+    Returns
+    -------
+    Tuple[bytes, bytes]
+        A tuple containing the stdout and stderr of the git command.
+    """
+    prefix = subpath.strip("/")
+    if prefix:
+        patterns = [f"{prefix}/{pattern}" if "/" in pattern else pattern for pattern in patterns]
+
+    sparse_cmd = ["git", "-C", local_path, "sparse-checkout", "set", "--no-cone", *patterns]
+    try:
+        return await _run_git_command(*sparse_cmd)
+    except RuntimeError as e:
+        print(f"Sparse checkout failed, checking out all files: {e}")
+        return b"", b""
+
+
 async def _run_git_command(*args: str) -> tuple[bytes, bytes]:
     """
     Executes a git command asynchronously and captures its output.
 
+    Git never prompts for credentials, a private or missing repository fails instead of waiting on stdin.
+    The process is killed if the command is cancelled, e.g. by a timeout.
+
     Parameters
     ----------
     *args : str
@@ -132,10 +301,16 @@ async def _run_git_command(*args: str) -> tuple[bytes, bytes]:
     """
     proc = await asyncio.create_subprocess_exec(
         *args,
+        stdin=asyncio.subprocess.DEVNULL,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
     )
-    stdout, stderr = await proc.communicate()
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        raise
     if proc.returncode != 0:
         error_message = stderr.decode().strip()
         raise RuntimeError(f"Git command failed: {' '.join(args)}\nError: {error_message}")
@@ -1,5 +1,12 @@
+import os
+
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 MAX_FILES = 10_000  # Maximum number of files to process
 MAX_TOTAL_SIZE_BYTES = 500 * 1024 * 1024  # 500 MB
+MAX_READ_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)  # Threads used to read file contents
 CLONE_TIMEOUT: int = 20
 TMP_BASE_PATH: str = "../tmp"
+VERBOSE: bool = bool(os.environ.get("GITINGEST_VERBOSE"))  # Log every scanned entry
+MIRROR_CACHE_DIR: str | None = os.environ.get("GITINGEST_CACHE_DIR")  # Bare mirrors reused across clones, off if unset
+MIRROR_TTL: int = 60 * 60  # Seconds before a cached mirror is fetched again
+MIRROR_TIMEOUT: int = 5 * 60  # The first mirror fetch downloads the whole history, so it gets more time than a clone
@@ -1,16 +1,18 @@
+import codecs
 import sys
-import io
+
+def _is_utf8(stream) -> bool:
+    encoding = getattr(stream, 'encoding', None)
+    return bool(encoding) and codecs.lookup(encoding).name == 'utf-8'
 
 def setup_encoding():
-    if sys.stdout.encoding != 'utf-8':
-        sys.stdout = io.TextIOWrapper(
-            sys.stdout.buffer, 
-            encoding='utf-8', 
-            errors='replace'
-        )
-    if sys.stderr.encoding != 'utf-8':
-        sys.stderr = io.TextIOWrapper(
-            sys.stderr.buffer, 
-            encoding='utf-8', 
-            errors='replace'
-        )
\ No newline at end of file
+    """
+    Make stdout and stderr write UTF-8, replacing characters that cannot be encoded.
+
+    Streams already using UTF-8 are left untouched, so repeated calls are cheap.
+    """
+    for stream in (sys.stdout, sys.stderr):
+        if stream is None or _is_utf8(stream) or not hasattr(stream, 'reconfigure'):
+            continue
+        # Reconfigure in place: re-wrapping the buffer would close it once the old wrapper is collected
+        stream.reconfigure(encoding='utf-8', errors='replace')
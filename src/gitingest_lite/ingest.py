@@ -6,7 +6,7 @@ import os
 from pathlib import Path
 import io
 import sys
-from typing import Union
+from typing import Any, Callable, Union
 
 # Import other modules from the package
 from gitingest_lite.encoding import setup_encoding
@@ -15,47 +15,86 @@ from gitingest_lite.clone import clone_repo, CloneConfig
 from gitingest_lite.ingest_from_query import ingest_from_query
 
 
+# Permission bits added by set_writable_permissions: everyone may read and write, directories stay traversable
+_WRITABLE_DIR_BITS = 0o777
+_WRITABLE_FILE_BITS = 0o666
+
+
+def _chmod_or_warn(path: str, bits: int) -> None:
+    try:
+        # chmod follows symlinks, whose target may lie outside the tree, so leave them alone like _force_writable does
+        st = os.lstat(path)
+        if stat.S_ISLNK(st.st_mode):
+            return
+        os.chmod(path, stat.S_IMODE(st.st_mode) | bits)
+    except OSError as e:
+        print(f"Warning: Could not set permissions for {path}: {str(e)}", file=sys.stderr)
+
+
 def set_writable_permissions(path: Union[str, Path]) -> None:
     """
     Recursively set writable permissions for all files and directories in the given path.
+
+    Read and write bits are added to each entry's mode, so executable files keep their executable bits.
+    Symlinks and their targets are left unchanged.
     
     Args:
         path: Directory path to process
     """
-    path = Path(path)
+    path = os.fspath(path)
+
+    if not os.path.isdir(path):
+        _chmod_or_warn(path, _WRITABLE_FILE_BITS)
+        return
+
+    _chmod_or_warn(path, _WRITABLE_DIR_BITS)
+    for root, dirs, files in os.walk(path):
+        for name in dirs:
+            _chmod_or_warn(os.path.join(root, name), _WRITABLE_DIR_BITS)
+        for name in files:
+            _chmod_or_warn(os.path.join(root, name), _WRITABLE_FILE_BITS)
+
+
+def _force_writable(func: Callable[[str], Any], path: str, exc: Any) -> None:
+    """
+    Error handler for shutil.rmtree: give the owner full access to the failing path and its
+    parent directory, then retry the operation. Only entries that actually fail are touched.
+    Failing to change permissions is not an error in itself, only the retried operation can fail.
     
+    Args:
+        func: The os function that failed (e.g. os.unlink, os.rmdir, os.scandir)
+        path: Path that could not be removed
+        exc: The exception (onexc) or exception information (onerror) from shutil.rmtree
+    """
+    # Removing an entry needs write access to its parent, listing a directory needs read access
+    for target in (os.path.dirname(path), path):
+        try:
+            if target and not os.path.islink(target):
+                os.chmod(target, os.stat(target).st_mode | stat.S_IRWXU)
+        except OSError:
+            # E.g. deleted concurrently or owned by another user, the retry below reports the failure that matters
+            pass
+
     try:
-        # Set write permissions for the root directory
-        current_mode = path.stat().st_mode
-        new_mode = current_mode | stat.S_IWRITE | stat.S_IWGRP | stat.S_IWOTH
-        path.chmod(new_mode)
-        
-        # If it's a directory, process all contents recursively
-        if path.is_dir():
-            for item in path.rglob('*'):
-                try:
-                    current_mode = item.stat().st_mode
-                    new_mode = current_mode | stat.S_IWRITE | stat.S_IWGRP | stat.S_IWOTH
-                    item.chmod(new_mode)
-                except (PermissionError, OSError) as e:
-                    print(f"Warning: Could not set permissions for {item}: {str(e)}", file=sys.stderr)
-                    
-    except (PermissionError, OSError) as e:
-        print(f"Warning: Could not set permissions for {path}: {str(e)}", file=sys.stderr)
+        func(path)
+    except FileNotFoundError:
+        pass  # Already gone, which is all the removal needed
+
 
 def safe_rmtree(path: Union[str, Path]) -> None:
     """
-    Safely remove a directory tree after setting proper permissions.
+    Safely remove a directory tree, fixing permissions only on entries that fail to delete.
     
     Args:
         path: Directory path to remove
     """
     try:
-        # First set proper permissions
-        set_writable_permissions(path)
-        
-        # Then attempt to remove the directory tree
-        shutil.rmtree(path, ignore_errors=True)
+        # Read-only entries (e.g. git objects on Windows) are made writable on demand
+        if sys.version_info >= (3, 12):
+            shutil.rmtree(path, onexc=_force_writable)
+        else:
+            # onerror is deprecated in favour of onexc from Python 3.12
+            shutil.rmtree(path, onerror=_force_writable)
         print(f"Successfully cleaned up directory: {path}", file=sys.stderr)
     except Exception as e:
         print(f"Warning: Could not clean up directory {path}: {str(e)}", file=sys.stderr)
@@ -63,7 +102,9 @@ def safe_rmtree(path: Union[str, Path]) -> None:
 def ingest(source: str, max_file_size: int = 10 * 1024 * 1024, 
           include_patterns: Union[list[str], str] = None, 
           exclude_patterns: Union[list[str], str] = None, 
-          output: str = None) -> tuple[str, str, str]:
+          output: str = None,
+          estimate_tokens: bool = True,
+          exact_tokens: bool = False) -> tuple[str, str, str]:
     """
     Analyze and create a text dump of source contents.
     
@@ -73,6 +114,8 @@ def ingest(source: str, max_file_size: int = 10 * 1024 * 1024,
         include_patterns: Patterns to include in analysis
         exclude_patterns: Patterns to exclude from analysis
         output: Output file path
+        estimate_tokens: Report a token count estimated from the output size
+        exact_tokens: Count tokens exactly with tiktoken, slower on large outputs
     
     Returns:
         Tuple of (summary, tree, content)
@@ -101,6 +144,8 @@ def ingest(source: str, max_file_size: int = 10 * 1024 * 1024,
                 local_path=query["local_path"],
                 commit=query.get("commit"),
                 branch=query.get("branch"),
+                sparse_patterns=query.get("include_patterns"),
+                subpath=query["subpath"],
             )
             clone_result = clone_repo(clone_config)
 
@@ -109,15 +154,19 @@ def ingest(source: str, max_file_size: int = 10 * 1024 * 1024,
             else:
                 raise TypeError("clone_repo did not return a coroutine as expected.")
 
-        summary, tree, content = ingest_from_query(query)
+        summary, tree, content = ingest_from_query(
+            query,
+            estimate_tokens=estimate_tokens,
+            exact_tokens=exact_tokens,
+        )
 
         if output:
             # Write with explicit UTF-8 encoding
+            # errors='replace' already handles unencodable characters, no need to round-trip the text
             with open(output, "w", encoding='utf-8', errors='replace') as f:
-                # Ensure all content is properly encoded
-                tree = tree.encode('utf-8', errors='replace').decode('utf-8') if isinstance(tree, str) else tree
-                content = content.encode('utf-8', errors='replace').decode('utf-8') if isinstance(content, str) else content
-                f.write(f"{tree}\n{content}")
+                f.write(tree)
+                f.write("\n")
+                f.write(content)
 
         return summary, tree, content
         
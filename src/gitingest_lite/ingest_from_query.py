@@ -1,52 +1,136 @@
+import functools
 import os
-from fnmatch import fnmatch
+import re
+import stat
+import subprocess
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from typing import Any
 import tiktoken
-from gitingest_lite.constant import MAX_TOTAL_SIZE_BYTES, MAX_FILES
+from pathspec import GitIgnoreSpec
+from gitingest_lite.constant import MAX_TOTAL_SIZE_BYTES, MAX_FILES, MAX_READ_WORKERS, VERBOSE
 
-def _should_include(path: str, base_path: str, include_patterns: list[str]) -> bool:
-    rel_path = path.replace(base_path, "").lstrip(os.sep)
-    include = False
-    for pattern in include_patterns:
-        if fnmatch(rel_path, pattern):
-            include = True
-    return include
+# Control bytes that don't appear in text files: everything below 0x20 except BEL, BS, TAB, LF, FF, CR and ESC
+_BINARY_BYTES_RE = re.compile(rb"[\x00-\x06\x0b\x0e-\x1a\x1c-\x1f]")
 
+# Extensions of formats that are always binary, such files are not opened for the text check
+_BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war", ".whl", ".egg",
+    ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".lib", ".class", ".pyc", ".pyo", ".wasm",
+    ".mp3", ".mp4", ".wav", ".ogg", ".flac", ".avi", ".mov", ".mkv", ".webm",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".ttf", ".otf", ".woff", ".woff2", ".eot", ".sqlite",
+})
 
+# Separator line framing each file header in the digest
+_SEPARATOR = "=" * 48 + "\n"
 
-def _should_exclude(path: str, base_path: str, ignore_patterns: list[str]) -> bool:
-    """
-    Check if a path should be excluded based on ignore patterns.
-    Supports full directory exclusions with nested content.
+# Directories are opened relative to their parent's descriptor where supported (not on Windows)
+_USE_DIR_FD = os.scandir in os.supports_fd and os.open in os.supports_dir_fd
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+# Index entry modes of symlinks and submodules, everything else tracked is a regular file
+_GIT_SYMLINK_MODE = "120000"
+_GIT_SUBMODULE_MODE = "160000"
+
+# Exact token counts for large digests are computed in parallel chunks
+_TOKEN_PARALLEL_THRESHOLD = 10 * 1024 * 1024
+_TOKEN_WORKERS = min(8, os.cpu_count() or 1)
+
+# Average UTF-8 bytes per cl100k_base token, used for the default estimate
+_BYTES_PER_TOKEN = 4
+
+# Paths are case-insensitive where normcase folds case (Windows); keep the compiled patterns consistent
+_PATTERN_FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+
+# Named groups emitted by pathspec, they would clash once several patterns are joined
+_NAMED_GROUP_RE = re.compile(r"\(\?P<\w+>")
+
+# Pattern syntax that is not literal text: bracket expressions, wildcards and escapes
+_PATTERN_BRACKET_RE = re.compile(r"\[!?\]?[^\]]*(?:\]|$)")
+_PATTERN_WILDCARD_RE = re.compile(r"[*?\[\]\\]+")
+
+# Compiled patterns and the literals that prefilter them, see _compile_patterns
+_Matcher = tuple[re.Pattern[str], tuple[str, ...] | None]
+
+
+def _pattern_literal(pattern: str) -> str:
+    """Returns the longest literal run of a pattern, text any path matching the pattern contains."""
+    runs = _PATTERN_WILDCARD_RE.split(_PATTERN_BRACKET_RE.sub("*", pattern.rstrip()))
+    literal = max((run.strip("/") for run in runs), key=len)
+    return literal.lower() if _PATTERN_FLAGS else literal
+
+
+def _compile_patterns(patterns: list[str] | None) -> _Matcher | None:
     """
+    Compile gitignore-style patterns into a single regular expression.
 
-    rel_path = path.replace(base_path, "").lstrip(os.sep)
-    rel_path = rel_path.replace('\\', '/')  # Normalize path separators
+    Each pattern is translated with pathspec's gitignore rules: patterns containing a slash are anchored
+    to the scanned directory, ``**`` spans directories and a trailing ``/`` only matches directories.
+    As in a .gitignore file the last matching pattern wins, a negated pattern (``!foo``) wraps the
+    patterns before it in a negative lookahead. Returns None if no pattern can match.
 
-    for pattern in ignore_patterns:
-        if pattern == "":
+    The regex comes with the longest literal of every pattern: a path containing none of them cannot
+    match, which a substring scan rules out much faster than the regex. Literals are None when a pattern
+    has none (e.g. ``*``).
+    """
+    combined = ""
+    literals: dict[str, None] | None = {}
+    for spec_pattern in GitIgnoreSpec.from_lines(patterns or []).patterns:
+        if spec_pattern.regex is None:
             continue
-            
-        # If pattern is a directory (ends with /), all its contents should be excluded
-        is_dir_pattern = pattern.endswith('/')
-        pattern_base = pattern.rstrip('/')
-        
-        # For directory patterns, exclude both the directory itself and all its contents
-        if is_dir_pattern:
-            # Check if path is or starts with the directory pattern
-            if rel_path == pattern_base or rel_path.startswith(f"{pattern_base}/"):
-                return True
-            # Also check parent directories
-            rel_parts = rel_path.split('/')
-            for i in range(len(rel_parts)):
-                if '/'.join(rel_parts[:i+1]) == pattern_base:
-                    return True
-        else:
-            # For file patterns, use standard fnmatch
-            if fnmatch(rel_path, pattern):
-                return True
-            
-    return False
+
+        pattern, include = spec_pattern.pattern, spec_pattern.include
+        regex = _NAMED_GROUP_RE.sub("(?:", spec_pattern.regex.pattern)
+        if not include:
+            # Nothing before the negation matches what it matches, later patterns are unaffected
+            if combined:
+                combined = f"(?!{regex})(?:{combined})"
+            continue
+
+        combined = f"{combined}|(?:{regex})" if combined else f"(?:{regex})"
+        literal = _pattern_literal(pattern)
+        if not literal:
+            literals = None
+        elif literals is not None:
+            literals[literal] = None
+
+    if not combined:
+        return None
+
+    return re.compile(combined, _PATTERN_FLAGS), tuple(literals) if literals is not None else None
+
+
+def _matches(rel_path: str, matcher: _Matcher) -> bool:
+    pattern_re, literals = matcher
+    if literals is not None:
+        needle = rel_path.lower() if _PATTERN_FLAGS else rel_path
+        if not any(literal in needle for literal in literals):
+            return False
+
+    return pattern_re.match(rel_path) is not None
+
+
+def _should_include(rel_path: str, include: _Matcher | None) -> bool:
+    """
+    Check if a path, relative to the scanned directory with '/' separators, matches the include patterns.
+    Directory paths carry a trailing '/'.
+    """
+    if include is None:
+        return False
+
+    return _matches(rel_path, include)
+
+
+def _should_exclude(rel_path: str, ignore: _Matcher | None) -> bool:
+    """
+    Check if a path, relative to the scanned directory with '/' separators, should be excluded
+    based on the compiled ignore patterns. Directory paths carry a trailing '/'.
+    """
+    if ignore is None:
+        return False
+
+    return _matches(rel_path, ignore)
+
 
 def _is_safe_symlink(symlink_path: str, base_path: str) -> bool:
 
@@ -60,22 +144,64 @@ def _is_safe_symlink(symlink_path: str, base_path: str) -> bool:
         return False
 
 
+def _is_text_chunk(chunk: bytes) -> bool:
+    """Determines if a chunk of bytes is likely text by checking for non-text control bytes."""
+    # A single scan that stops at the first control byte, without allocating a translated copy
+    return _BINARY_BYTES_RE.search(chunk) is None
+
+
+def _has_binary_extension(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in _BINARY_EXTENSIONS
+
+
 def _is_text_file(file_path: str) -> bool:
-    """Determines if a file is likely a text file based on its content."""
+    """Determines if a file is likely a text file based on its extension and content."""
+    if _has_binary_extension(file_path):
+        return False
+
     try:
         with open(file_path, "rb") as file:
             chunk = file.read(1024)
-        return not bool(chunk.translate(None, bytes([7, 8, 9, 10, 12, 13, 27] + list(range(0x20, 0x100)))))
+        return _is_text_chunk(chunk)
     except OSError:
         return False
 
 
-def _read_file_content(file_path: str) -> str:
+def _decode_text(data: bytes) -> str:
+    """Decodes file bytes as UTF-8 with the same newline handling as a text-mode read."""
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_if_text(file_path: str, max_file_size: int) -> str | None:
+    """
+    Reads a file if it is a text file.
+
+    The file is opened once: the first 1 KB is read for the text check and only text files have the
+    remainder read, up to ``max_file_size + 1`` bytes. Returns None for non-text files, unreadable files
+    and files larger than ``max_file_size``, whose content is left out of the digest.
+    Files with a known binary extension are not opened at all.
+    """
+    if _has_binary_extension(file_path):
+        return None
+
     try:
-        with open(file_path, encoding="utf-8", errors="ignore") as f:
-            return f.read()
-    except Exception as e:
-        return f"Error reading file: {str(e)}"
+        with open(file_path, "rb") as file:
+            head = file.read(1024)
+            if not _is_text_chunk(head):
+                return None
+
+            rest = file.read(max(max_file_size - len(head), 0) + 1)
+    except OSError:
+        return None
+
+    if len(head) + len(rest) > max_file_size:
+        return None
+
+    return _decode_text(head + rest)
+
 
 def _get_empty_dir_dict(path: str) -> dict[str, Any]:
     return {
@@ -89,180 +215,371 @@ def _get_empty_dir_dict(path: str) -> dict[str, Any]:
         "ignore_content": False,
     }
     
-def _scan_directory(
+def _list_directory(
     path: str,
-    query: dict[str, Any],
-    seen_paths: set[str] | None = None,
-    depth: int = 0,
-    stats: dict[str, int] | None = None,
-) -> dict[str, Any] | None:
-    """Recursively analyzes a directory and its contents with safety limits."""
-    if seen_paths is None:
-        seen_paths = set()
+    seen_paths: set[tuple[int, int]],
+    parent_fd: int | None = None,
+) -> tuple[list[os.DirEntry[str]], int | None]:
+    """
+    Lists the entries of a directory, sorted by name for consistent ordering.
 
-    if stats is None:
-        stats = {"total_files": 0, "total_size": 0}
+    Where the platform supports it, the directory is opened relative to its parent's descriptor, like
+    ``os.fwalk`` does, so neither its stat nor the stat of its entries resolve the full path again.
+    The returned descriptor backs the entries and must be closed once they are processed.
+    Returns no entries for missing paths, non-directories, directories already visited
+    (e.g. through a symlink loop) and directories that cannot be read.
+    """
+    if not _USE_DIR_FD:
+        return _list_directory_by_path(path, seen_paths), None
 
-    # Convert to absolute paths and normalize slashes, remove trailing slashes
-    path = os.path.abspath(os.path.normpath(path.rstrip('\\/')))
-    base_path = os.path.abspath(os.path.normpath(query["local_path"].rstrip('\\/')))
-    
-    # Check if path exists and is a directory
-    if not os.path.exists(path):
+    try:
+        if parent_fd is None:
+            fd = os.open(path, _DIR_OPEN_FLAGS)
+        else:
+            fd = os.open(os.path.basename(path), _DIR_OPEN_FLAGS, dir_fd=parent_fd)
+    except NotADirectoryError:
+        print(f"Path is not a directory: {path}")
+        return [], None
+    except PermissionError:
+        print(f"Permission denied: {path}")
+        return [], None
+    except FileNotFoundError:
         print(f"Path does not exist: {path}")
-        return _get_empty_dir_dict(path)
-        
-    if not os.path.isdir(path):
+        return [], None
+    except OSError as e:
+        print(f"Cannot open directory {path}: {e.strerror}")
+        return [], None
+
+    try:
+        dir_stat = os.fstat(fd)
+        if not stat.S_ISDIR(dir_stat.st_mode):
+            print(f"Path is not a directory: {path}")
+            os.close(fd)
+            return [], None
+
+        if not _mark_visited(path, dir_stat, seen_paths):
+            os.close(fd)
+            return [], None
+
+        # A single scandir pass yields cached type information; entry stats go through the descriptor
+        with os.scandir(fd) as it:
+            return sorted(it, key=lambda entry: entry.name), fd
+    except PermissionError:
+        print(f"Permission denied: {path}")
+    except OSError as e:
+        print(f"Cannot read directory {path}: {e.strerror}")
+    os.close(fd)
+    return [], None
+
+
+def _list_directory_by_path(path: str, seen_paths: set[tuple[int, int]]) -> list[os.DirEntry[str]]:
+    """Lists the entries of a directory by path, see _list_directory."""
+    # Check if path exists and is a directory, a single stat also identifies it for loop detection
+    try:
+        dir_stat = os.stat(path)
+    except FileNotFoundError:
+        print(f"Path does not exist: {path}")
+        return []
+    except OSError as e:
+        print(f"Cannot open directory {path}: {e.strerror}")
+        return []
+
+    if not stat.S_ISDIR(dir_stat.st_mode):
         print(f"Path is not a directory: {path}")
-        return _get_empty_dir_dict(path)
+        return []
+
+    if not _mark_visited(path, dir_stat, seen_paths):
+        return []
+
+    try:
+        # A single scandir pass yields cached type and stat information per entry
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except PermissionError:
+        print(f"Permission denied: {path}")
+        return []
+    except OSError as e:
+        print(f"Cannot read directory {path}: {e.strerror}")
+        return []
+
+
+class _TrackedEntry:
+    """An entry listed from the git index, with the ``os.DirEntry`` methods _scan_directory uses."""
+
+    __slots__ = ("name", "path", "_kind")
+
+    def __init__(self, path: str, kind: str) -> None:
+        self.name = os.path.basename(path)
+        self.path = path
+        self._kind = kind
+
+    def is_dir(self) -> bool:
+        return self._kind == "dir" or (self._kind == "symlink" and os.path.isdir(self.path))
+
+    def is_file(self) -> bool:
+        return self._kind == "file" or (self._kind == "symlink" and os.path.isfile(self.path))
+
+    def is_symlink(self) -> bool:
+        return self._kind == "symlink"
+
+    def stat(self) -> os.stat_result:
+        return os.stat(self.path)
 
-    # Ensure we're not skipping the base path
-    if path == base_path or path.startswith(base_path):
-        base_path = path
 
-    real_path = os.path.realpath(path)
-    if real_path in seen_paths:
-        print(f"Skipping already visited path: {path}")
-        return _get_empty_dir_dict(path)
+def _list_tracked_files(path: str) -> dict[str, list[_TrackedEntry]] | None:
+    """
+    Lists the files git tracks under a directory with a single ``git ls-files`` call.
+
+    Returns the entries of every directory, keyed by directory path and sorted by name like _list_directory.
+    Files outside a sparse checkout are left out, submodules are listed as empty directories.
+    Returns None if the directory is not in a git work tree or git cannot be run.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-C", path, "ls-files", "-z", "--stage", "-t"],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    listing: dict[str, dict[str, _TrackedEntry]] = {path: {}}
+    dir_paths = {"": path}
+
+    def add_dir(rel_dir: str) -> str:
+        parent_rel, _, name = rel_dir.rpartition("/")
+        parent = dir_paths.get(parent_rel) or add_dir(parent_rel)
+        dir_path = os.path.join(parent, name)
+        listing[parent][name] = _TrackedEntry(dir_path, "dir")
+        listing[dir_path] = {}
+        dir_paths[rel_dir] = dir_path
+        return dir_path
+
+    for record in result.stdout.split(b"\0"):
+        if not record:
+            continue
+
+        # "<tag> <mode> <object> <stage>\t<path>", the "S" tag marks files skipped by a sparse checkout
+        meta, _, raw_path = record.partition(b"\t")
+        tag, mode = meta.decode("ascii").split(" ", 2)[:2]
+        if tag == "S":
+            continue
 
-    seen_paths.add(real_path)
+        rel_dir, _, name = os.fsdecode(raw_path).rpartition("/")
+        parent = dir_paths.get(rel_dir) or add_dir(rel_dir)
+        entry_path = os.path.join(parent, name)
+        if mode == _GIT_SUBMODULE_MODE:
+            listing[parent][name] = _TrackedEntry(entry_path, "dir")
+            listing.setdefault(entry_path, {})
+        else:
+            listing[parent][name] = _TrackedEntry(entry_path, "symlink" if mode == _GIT_SYMLINK_MODE else "file")
+
+    return {dir_path: sorted(entries.values(), key=lambda entry: entry.name) for dir_path, entries in listing.items()}
+
+
+def _list_tracked_directory(
+    path: str,
+    tracked: dict[str, list[_TrackedEntry]],
+    seen_paths: set[tuple[int, int]],
+) -> tuple[list[_TrackedEntry] | list[os.DirEntry[str]], int | None]:
+    """
+    Lists a directory from the git index, see _list_tracked_files, with the return value of _list_directory.
+
+    Directories git does not list, i.e. those reached through a tracked symlink, are read from the file
+    system like the walk does. Every directory is marked as visited, so symlink loops end where they do in the walk.
+    """
+    entries = tracked.get(path)
+    if entries is None:
+        return _list_directory(path, seen_paths)
+
+    try:
+        dir_stat = os.stat(path)
+    except OSError:
+        print(f"Path does not exist: {path}")
+        return [], None
+    return (entries if _mark_visited(path, dir_stat, seen_paths) else []), None
 
-    result = _get_empty_dir_dict(path)
 
-    ignore_patterns = query["ignore_patterns"]
+def _mark_visited(path: str, dir_stat: os.stat_result, seen_paths: set[tuple[int, int]]) -> bool:
+    """Records a directory as visited, returns False if it was already visited."""
+    # Device and inode identify a directory however it was reached, without resolving every path component
+    dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+    if dir_key in seen_paths:
+        if VERBOSE:
+            print(f"Skipping already visited path: {path}")
+        return False
+
+    seen_paths.add(dir_key)
+    return True
+
+
+def _scan_directory(
+    path: str,
+    query: dict[str, Any],
+    executor: Executor,
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """
+    Analyzes a directory and its contents with safety limits in a single iterative pass.
+
+    Returns the directory tree, which only holds metadata, and the flat list of files in tree order.
+    File contents are read on ``executor`` while the walk continues; file records hold the pending future.
+    Cloned repositories are listed from the git index instead of walking the file system.
+    """
+    seen_paths: set[tuple[int, int]] = set()
+    total_files = 0
+    total_size = 0
+    files: list[dict[str, Any]] = []
+
+    ignore = query["_exclude"]
+    include = query["_include"]
     include_patterns = query["include_patterns"]
 
+    # Convert to absolute paths and normalize slashes, remove trailing slashes
+    path = os.path.abspath(os.path.normpath(path.rstrip('\\/')))
+    root = _get_empty_dir_dict(path)
+    root_prefix_len = len(os.path.join(path, ""))
+    local_root = query["_local_root"]
+    local_prefix_len = len(local_root)
+    # A fresh clone holds exactly the tracked files, the index lists them without a directory walk
+    tracked = _list_tracked_files(path) if query.get("url") else None
+    if tracked is None:
+        entries, fd = _list_directory(path, seen_paths)
+    else:
+        entries, fd = _list_tracked_directory(path, tracked, seen_paths)
+
+    # Explicit stack of (directory node, remaining entries, directory descriptor) instead of recursion
+    stack = [(root, iter(entries), fd)]
     try:
-        items = sorted(os.listdir(path))  # Sort for consistent ordering
-        for item in items:
-            item_path = os.path.normpath(os.path.join(path, item))
-            
-            print(f"Checking path: {item_path}")  # Show what we're actually checking
-
-            # Check if the item should be excluded
-            if _should_exclude(item_path, base_path, ignore_patterns):
-                print(f"Skipping excluded path: {item_path}")
+        while stack:
+            node, entries, fd = stack[-1]
+            entry = next(entries, None)
+
+            # Directory done: add it to its parent if non-empty or no include patterns are specified
+            if entry is None:
+                stack.pop()
+                if fd is not None:
+                    os.close(fd)
+                if stack and (not include_patterns or node["file_count"] > 0):
+                    parent = stack[-1][0]
+                    parent["children"].append(node)
+                    parent["size"] += node["size"]
+                    parent["file_count"] += node["file_count"]
+                    parent["dir_count"] += 1 + node["dir_count"]
+                continue
+
+            item = entry.name
+            item_path = os.path.join(node["path"], item)
+
+            # Per-entry logging is opt-in, it dominates wall time on large trees
+            if VERBOSE:
+                print(f"Checking path: {item_path}")  # Show what we're actually checking
+
+            # Patterns are matched against the path relative to the directory being scanned.
+            # Excluded directories are pruned here, before their contents are listed.
+            rel_path = item_path[root_prefix_len:]
+            if os.sep != "/":
+                rel_path = rel_path.replace(os.sep, "/")
+            is_dir = entry.is_dir()
+            if _should_exclude(rel_path + "/" if is_dir else rel_path, ignore):
+                if VERBOSE:
+                    print(f"Skipping excluded path: {item_path}")
+                continue
+
+            # Only symlinks need resolving: skip those pointing outside the repository
+            if entry.is_symlink() and not _is_safe_symlink(item_path, local_root):
+                if VERBOSE:
+                    print(f"Skipping symlink outside the repository: {item_path}")
                 continue
 
             # Check if this is a file and include patterns are specified
-            is_file = os.path.isfile(item_path)
-            if is_file and include_patterns and not _should_include(item_path, base_path, include_patterns):
-                print(f"Skipping file not matching include patterns: {item_path}")
+            is_file = entry.is_file()
+            if is_file and include_patterns and not _should_include(rel_path, include):
+                if VERBOSE:
+                    print(f"Skipping file not matching include patterns: {item_path}")
                 continue
 
             # Process file
             if is_file:
-                file_size = os.path.getsize(item_path)
-                
+                file_size = entry.stat().st_size
+
                 # Check size and file count limits
-                if stats["total_size"] + file_size > MAX_TOTAL_SIZE_BYTES:
-                    print(f"Skipping file {item_path}: would exceed total size limit")
+                if total_size + file_size > MAX_TOTAL_SIZE_BYTES:
+                    if VERBOSE:
+                        print(f"Skipping file {item_path}: would exceed total size limit")
                     continue
 
-                if stats["total_files"] >= MAX_FILES:
+                if total_files >= MAX_FILES:
                     print(f"Maximum file limit ({MAX_FILES}) reached")
-                    break
+                    # Skip the rest of this directory
+                    stack[-1] = (node, iter(()), fd)
+                    continue
 
                 # Update stats
-                stats["total_files"] += 1
-                stats["total_size"] += file_size
-
-                # Check if it's a text file
-                is_text = _is_text_file(item_path)
-                content = _read_file_content(item_path) if is_text else "[Non-text file]"
-
-                child = {
-                    "name": item,
-                    "type": "file",
-                    "size": file_size,
-                    "content": content,
-                    "path": item_path,
-                }
-                result["children"].append(child)
-                result["size"] += file_size
-                result["file_count"] += 1
-
-            # Process directory
-            elif os.path.isdir(item_path):
-                # Recursive directory processing
-                subdir = _scan_directory(
-                    path=item_path,
-                    query=query,
-                    seen_paths=seen_paths,
-                    depth=depth + 1,
-                    stats=stats,
+                total_files += 1
+                total_size += file_size
+
+                node["children"].append(
+                    {
+                        "name": item,
+                        "type": "file",
+                        "size": file_size,
+                        "path": item_path,
+                    },
                 )
+                node["size"] += file_size
+                node["file_count"] += 1
+
+                # Content of files over the size limit is left out, so don't submit a read for them at all
+                if file_size <= query["max_file_size"]:
+                    files.append(
+                        {
+                            "path": item_path[local_prefix_len:],
+                            "content": executor.submit(_read_if_text, item_path, query["max_file_size"]),
+                            "size": file_size,
+                        },
+                    )
 
-                # Add non-empty subdirectories or directories matching include patterns
-                if subdir and (not include_patterns or subdir["file_count"] > 0):
-                    result["children"].append(subdir)
-                    result["size"] += subdir["size"]
-                    result["file_count"] += subdir["file_count"]
-                    result["dir_count"] += 1 + subdir.get("dir_count", 0)
-
-    except PermissionError:
-        print(f"Permission denied: {path}")
-
-    return result
-
-
-def _extract_files_content(
-    query: dict[str, Any],
-    node: dict[str, Any],
-    max_file_size: int,
-    files: list[dict[str, Any]] | None = None,
-) -> list[dict[str, Any]]:
-    """Recursively collects all text files with their contents."""
-    if files is None:
-        files = []
-
-    if node["type"] == "file" and node["content"] != "[Non-text file]":
-        content = node["content"]
-        if node["size"] > max_file_size:
-            content = None
-
-        files.append(
-            {
-                "path": node["path"].replace(query["local_path"], ""),
-                "content": content,
-                "size": node["size"],
-            },
-        )
-    elif node["type"] == "directory":
-        for child in node["children"]:
-            _extract_files_content(query=query, node=child, max_file_size=max_file_size, files=files)
+            # Process directory
+            elif is_dir:
+                if tracked is None:
+                    child_entries, child_fd = _list_directory(item_path, seen_paths, parent_fd=fd)
+                else:
+                    child_entries, child_fd = _list_tracked_directory(item_path, tracked, seen_paths)
+                stack.append((_get_empty_dir_dict(item_path), iter(child_entries), child_fd))
+    finally:
+        # Close the descriptors of directories left open if the walk was interrupted
+        for _, _, open_fd in stack:
+            if open_fd is not None:
+                os.close(open_fd)
 
-    return files
+    return root, files
 
 
 def _create_file_content_string(files: list[dict[str, Any]]) -> str:
-    """Creates a formatted string of file contents with separators."""
-    output = ""
-    separator = "=" * 48 + "\n"
+    """
+    Creates a formatted string of file contents with separators, README.md first.
 
-    # First add README.md if it exists
+    Pending reads are resolved in file order while the string is built, and file contents are joined
+    as they are rather than copied into a per-file string first.
+    """
+    # The first slots are reserved for README.md so a single pass keeps all other files in their original order
+    parts = ["", "", ""]
     for file in files:
-        if not file["content"]:
+        content = file["content"]
+        if isinstance(content, Future):
+            content = content.result()
+        if not content:
             continue
 
+        chunk = (f"{_SEPARATOR}File: {file['path']}\n{_SEPARATOR}", content, "\n\n")
         if file["path"].lower() == "/readme.md":
-            output += separator
-            output += f"File: {file['path']}\n"
-            output += separator
-            output += f"{file['content']}\n\n"
-            break
-
-    # Then add all other files in their original order
-    for file in files:
-        if not file["content"] or file["path"].lower() == "/readme.md":
+            if not parts[0]:
+                parts[0:3] = chunk
             continue
 
-        output += separator
-        output += f"File: {file['path']}\n"
-        output += separator
-        output += f"{file['content']}\n\n"
+        parts.extend(chunk)
 
-    return output
+    return "".join(parts)
 
 
 def _create_summary_string(query: dict[str, Any], nodes: dict[str, Any]) -> str:
@@ -286,36 +603,87 @@ def _create_summary_string(query: dict[str, Any], nodes: dict[str, Any]) -> str:
 
 def _create_tree_structure(query: dict[str, Any], node: dict[str, Any], prefix: str = "", is_last: bool = True) -> str:
     """Creates a tree-like string representation of the file structure."""
-    tree = ""
+    lines: list[str] = []
+    _append_tree_lines(query, node, prefix, is_last, lines)
+    return "".join(lines)
 
+
+def _append_tree_lines(
+    query: dict[str, Any],
+    node: dict[str, Any],
+    prefix: str,
+    is_last: bool,
+    lines: list[str],
+) -> None:
+    """Appends the tree lines of a node and its children to a shared list, avoiding per-level string copies."""
     if not node["name"]:
         node["name"] = query["slug"]
 
     if node["name"]:
         current_prefix = "└── " if is_last else "├── "
         name = node["name"] + "/" if node["type"] == "directory" else node["name"]
-        tree += prefix + current_prefix + name + "\n"
+        lines.append(prefix + current_prefix + name + "\n")
 
     if node["type"] == "directory":
         # Adjust prefix only if we added a node name
         new_prefix = prefix + ("    " if is_last else "│   ") if node["name"] else prefix
         children = node["children"]
         for i, child in enumerate(children):
-            tree += _create_tree_structure(query, child, new_prefix, i == len(children) - 1)
+            _append_tree_lines(query, child, new_prefix, i == len(children) - 1, lines)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    """Returns the cl100k_base encoding, built on first use."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _split_on_separator(text: str, parts: int) -> list[str]:
+    """Splits a digest into about ``parts`` chunks of similar length, cutting only before a file separator."""
+    chunks = []
+    start = 0
+    for i in range(1, parts):
+        cut = text.find(_SEPARATOR, max(start + 1, len(text) * i // parts))
+        if cut == -1:
+            break
+        chunks.append(text[start:cut])
+        start = cut
+    chunks.append(text[start:])
+    return chunks
 
-    return tree
 
+def _count_tokens(encoding: tiktoken.Encoding, context_string: str) -> int:
+    """
+    Counts the tokens in a text string.
+
+    Texts above ``_TOKEN_PARALLEL_THRESHOLD`` characters are split at file separators into chunks encoded
+    on worker threads, tiktoken releases the GIL while encoding and counts add up across chunks.
+    """
+    if len(context_string) > _TOKEN_PARALLEL_THRESHOLD:
+        chunks = _split_on_separator(context_string, _TOKEN_WORKERS)
+        with ThreadPoolExecutor(max_workers=_TOKEN_WORKERS) as executor:
+            return sum(executor.map(lambda chunk: len(encoding.encode(chunk, disallowed_special=())), chunks))
+
+    return len(encoding.encode(context_string, disallowed_special=()))
+
+
+def _generate_token_string(context_string: str, exact_tokens: bool = False) -> str | None:
+    """
+    Returns the number of tokens in a text string.
 
-def _generate_token_string(context_string: str) -> str | None:
-    """Returns the number of tokens in a text string."""
+    By default the count is estimated from the UTF-8 size and marked with a leading "~",
+    ``exact_tokens`` encodes the text with tiktoken.
+    """
     formatted_tokens = ""
-    try:
-        encoding = tiktoken.get_encoding("cl100k_base")
-        total_tokens = len(encoding.encode(context_string, disallowed_special=()))
+    if exact_tokens:
+        try:
+            total_tokens = _count_tokens(_get_encoding(), context_string)
 
-    except Exception as e:
-        print(e)
-        return None
+        except Exception as e:
+            print(e)
+            return None
+    else:
+        total_tokens = len(context_string.encode("utf-8")) // _BYTES_PER_TOKEN
 
     if total_tokens > 1_000_000:
         formatted_tokens = f"{total_tokens / 1_000_000:.1f}M"
@@ -324,24 +692,32 @@ def _generate_token_string(context_string: str) -> str | None:
     else:
         formatted_tokens = f"{total_tokens}"
 
-    return formatted_tokens
+    return formatted_tokens if exact_tokens else f"~{formatted_tokens}"
 
 
-def _ingest_single_file(path: str, query: dict[str, Any]) -> tuple[str, str, str]:
+def _ingest_single_file(
+    path: str,
+    query: dict[str, Any],
+    estimate_tokens: bool,
+    exact_tokens: bool,
+) -> tuple[str, str, str]:
     if not os.path.isfile(path):
         raise ValueError(f"Path {path} is not a file")
 
     file_size = os.path.getsize(path)
-    is_text = _is_text_file(path)
-    if not is_text:
-        raise ValueError(f"File {path} is not a text file")
-
-    content = _read_file_content(path)
     if file_size > query["max_file_size"]:
+        # Only the text check is needed, the content itself is left out
+        if not _is_text_file(path):
+            raise ValueError(f"File {path} is not a text file")
         content = "[Content ignored: file too large]"
+    else:
+        # Text check and read share a single open
+        content = _read_if_text(path, query["max_file_size"])
+        if content is None:
+            raise ValueError(f"File {path} is not a text file")
 
     file_info = {
-        "path": path.replace(query["local_path"], ""),
+        "path": path[len(query["_local_root"]):],
         "content": content,
         "size": file_size,
     }
@@ -356,31 +732,46 @@ def _ingest_single_file(path: str, query: dict[str, Any]) -> tuple[str, str, str
     files_content = _create_file_content_string([file_info])
     tree = "Directory structure:\n└── " + os.path.basename(path)
 
-    formatted_tokens = _generate_token_string(files_content)
-    if formatted_tokens:
-        summary += f"\nEstimated tokens: {formatted_tokens}"
+    if estimate_tokens or exact_tokens:
+        formatted_tokens = _generate_token_string(files_content, exact_tokens)
+        if formatted_tokens:
+            summary += f"\nEstimated tokens: {formatted_tokens}"
 
     return summary, tree, files_content
 
 
-def _ingest_directory(path: str, query: dict[str, Any]) -> tuple[str, str, str]:
-    nodes = _scan_directory(path=path, query=query)
-    if not nodes:
-        raise ValueError(f"No files found in {path}")
-    files = _extract_files_content(query=query, node=nodes, max_file_size=query["max_file_size"])
+def _ingest_directory(
+    path: str,
+    query: dict[str, Any],
+    estimate_tokens: bool,
+    exact_tokens: bool,
+) -> tuple[str, str, str]:
+    with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as executor:
+        nodes, files = _scan_directory(path=path, query=query, executor=executor)
+        # Contents are emitted as their reads complete, while later files are still being read
+        files_content = _create_file_content_string(files)
     summary = _create_summary_string(query, nodes)
     tree = "Directory structure:\n" + _create_tree_structure(query, nodes)
-    files_content = _create_file_content_string(files)
 
-    formatted_tokens = _generate_token_string(tree + files_content)
-    if formatted_tokens:
-        summary += f"\nEstimated tokens: {formatted_tokens}"
+    if estimate_tokens or exact_tokens:
+        formatted_tokens = _generate_token_string(tree + files_content, exact_tokens)
+        if formatted_tokens:
+            summary += f"\nEstimated tokens: {formatted_tokens}"
 
     return summary, tree, files_content
 
 
-def ingest_from_query(query: dict[str, Any]) -> tuple[str, str, str]:
-    """Main entry point for analyzing a codebase directory or single file."""
+def ingest_from_query(
+    query: dict[str, Any],
+    estimate_tokens: bool = True,
+    exact_tokens: bool = False,
+) -> tuple[str, str, str]:
+    """
+    Main entry point for analyzing a codebase directory or single file.
+
+    The summary reports a token count estimated from the digest size, ``exact_tokens`` counts them with
+    tiktoken instead and ``estimate_tokens=False`` leaves the count out.
+    """
     # Normalize the path properly, remove trailing slashes
     path = os.path.abspath(os.path.normpath(
         os.path.join(query["local_path"].rstrip('\\/'), 
@@ -390,10 +781,17 @@ def ingest_from_query(query: dict[str, Any]) -> tuple[str, str, str]:
     if not os.path.exists(path):
         raise ValueError(f"{query['slug']} cannot be found")
 
+    # Digest paths are sliced off this prefix, the scanned paths are absolute too
+    query["_local_root"] = os.path.abspath(query["local_path"])
+
+    # Compile the ignore and include patterns once for the whole ingestion
+    query["_exclude"] = _compile_patterns(query["ignore_patterns"])
+    query["_include"] = _compile_patterns(query["include_patterns"])
+
     if query.get("type") == "blob":
-        return _ingest_single_file(path, query)
+        return _ingest_single_file(path, query, estimate_tokens, exact_tokens)
 
     if not os.path.isdir(path):
         raise ValueError(f"Path is not a directory: {path}")
 
-    return _ingest_directory(path, query)
+    return _ingest_directory(path, query, estimate_tokens, exact_tokens)
@@ -1,37 +1,66 @@
+import functools
 import os
 import re
 import string
-import uuid
 from typing import Any, Union
 from urllib.parse import urlparse, unquote
 
-from gitingest_lite.constant import TMP_BASE_PATH
+from gitingest_lite.constant import TMP_BASE_PATH, VERBOSE
 from gitingest_lite.ignore_patterns import DEFAULT_IGNORE_PATTERNS
-HEX_DIGITS = set(string.hexdigits)
+HEX_DIGITS = string.hexdigits.encode("ascii")
+
+# URL patterns used by extract_valid_url, matched against the source with '/' separators
+_GITHUB_URL_RE = re.compile(r'^(https?://)?github\.com/[\w-]+/[\w-]+(/.*)?$')
+_GITHUB_PATH_RE = re.compile(r'github\.com/[^\s/\\]+/[^\s/\\]+')
+_HTTP_URL_RE = re.compile(r'https?://\S+')
+
+# URLs that _parse_url splits without urlparse
+_GITHUB_URL_PREFIXES = ("https://github.com/", "http://github.com/")
+
+# Separator stripped from and completed on user patterns in _parse_patterns
+_SEP = os.sep
+
+# Pattern lists are split on commas and whitespace, each pattern may only use these characters
+_COMMA_TO_SPACE = str.maketrans({',': ' '})
+_PATTERN_VALID_RE = re.compile(r'[\w\-./+*]+')
+# ASCII subset of _PATTERN_VALID_RE, checked first as a plain set lookup per character
+_PATTERN_CHARS = frozenset(string.ascii_letters + string.digits + "_-./+*")
+
+# Hashed once, include patterns rarely name a default pattern so the defaults can usually be kept as-is
+_DEFAULT_IGNORE_FROZENSET = frozenset(DEFAULT_IGNORE_PATTERNS)
 
 
 def _parse_url(url: str) -> dict[str, Any]:
     url = url.split(" ")[0]
-    url = unquote(url)  # Decode URL-encoded characters
+    if "%" in url:
+        url = unquote(url)  # Decode URL-encoded characters
 
     if not url.startswith("https://") and not url.startswith("http://"):
         url = "https://" + url
 
-    # Parse the URL
-    parsed_url = urlparse(url)
+    if url.startswith(_GITHUB_URL_PREFIXES):
+        # Fast path for the common case: the path is what follows the host, up to a query or fragment
+        base_url = "https://github.com"
+        path = url[url.index("github.com/") + len("github.com"):].partition("#")[0].partition("?")[0]
+    else:
+        # Parse the URL
+        parsed_url = urlparse(url)
 
-    if not parsed_url.scheme or not parsed_url.netloc:
-        raise ValueError("Invalid repository URL. Please provide a valid Git repository URL.")
+        if not parsed_url.scheme or not parsed_url.netloc:
+            raise ValueError("Invalid repository URL. Please provide a valid Git repository URL.")
+
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        path = parsed_url.path
 
     # Extract user and repository from path
-    path_parts = parsed_url.path.strip("/").split("/")
+    path_parts = path.strip("/").split("/")
 
     if len(path_parts) < 2:
         raise ValueError("Invalid repository URL. Please provide a valid Git repository URL.")
 
     user_name = path_parts[0]
     repo_name = path_parts[1]
-    _id = str(uuid.uuid4())
+    _id = os.urandom(16).hex()  # Random id naming the clone directory
     slug = f"{user_name}-{repo_name}"
 
     parsed = {
@@ -42,7 +71,7 @@ def _parse_url(url: str) -> dict[str, Any]:
         "commit": None,
         "subpath": "/",
         "local_path": os.path.join(TMP_BASE_PATH, _id, slug),
-        "url": f"{parsed_url.scheme}://{parsed_url.netloc}/{user_name}/{repo_name}",
+        "url": f"{base_url}/{user_name}/{repo_name}",
         "slug": slug,
         "id": _id,
     }
@@ -69,24 +98,8 @@ def _parse_url(url: str) -> dict[str, Any]:
 
 def _is_valid_git_commit_hash(commit: str) -> bool:
     """Check if a string is a valid Git commit hash."""
-    return len(commit) == 40 and all(c in HEX_DIGITS for c in commit)
-
-
-def _normalize_pattern(pattern: str) -> str:
-    """
-    Normalize a pattern by stripping and formatting.
-
-    Args:
-        pattern (str): The ignore pattern.
-
-    Returns:
-        str: Normalized pattern.
-    """
-    pattern = pattern.strip()
-    pattern = pattern.lstrip(os.sep)
-    if pattern.endswith(os.sep):
-        pattern += "*"
-    return pattern
+    # Deleting every hex digit in one C-level pass must leave nothing behind
+    return len(commit) == 40 and commit.isascii() and not commit.encode("ascii").translate(None, HEX_DIGITS)
 
 
 def _parse_patterns(pattern: list[str] | str) -> list[str]:
@@ -94,7 +107,7 @@ def _parse_patterns(pattern: list[str] | str) -> list[str]:
     Parse and validate file/directory patterns for inclusion or exclusion.
 
     Takes either a single pattern string or list of pattern strings and processes them into a normalized list.
-    Patterns are split on commas and spaces, validated for allowed characters, and normalized.
+    Patterns are split on commas and whitespace, validated for allowed characters, and normalized.
 
     Parameters
     ----------
@@ -115,25 +128,29 @@ def _parse_patterns(pattern: list[str] | str) -> list[str]:
     """
     patterns = pattern if isinstance(pattern, list) else [pattern]
 
+    # split() without a separator also drops the empty strings between consecutive separators
     parsed_patterns = []
     for p in patterns:
-        parsed_patterns.extend(re.split(",| ", p))
-
-    parsed_patterns = [p for p in parsed_patterns if p != ""]
+        parsed_patterns.extend(p.translate(_COMMA_TO_SPACE).split())
 
     for p in parsed_patterns:
-        if not all(c.isalnum() or c in "-_./+*" for c in p):
+        # The regex only runs for characters outside the ASCII set, e.g. non-ASCII letters
+        if not _PATTERN_CHARS.issuperset(p) and not _PATTERN_VALID_RE.fullmatch(p):
             raise ValueError(
                 f"Pattern '{p}' contains invalid characters. Only alphanumeric characters, dash (-), "
                 "underscore (_), dot (.), forward slash (/), plus (+), and asterisk (*) are allowed."
             )
 
-    return [_normalize_pattern(p) for p in parsed_patterns]
+    # Normalize: strip whitespace and leading separators, directory patterns match their contents
+    stripped = (p.strip().lstrip(_SEP) for p in parsed_patterns)
+    return [p + "*" if p.endswith(_SEP) else p for p in stripped]
 
 
 def _override_ignore_patterns(ignore_patterns: list[str], include_patterns: list[str]) -> list[str]:
     """
-    Removes patterns from ignore_patterns that are present in include_patterns using set difference.
+    Removes patterns from ignore_patterns that are present in include_patterns.
+
+    The remaining patterns keep their order, which matters once negated patterns are involved.
 
     Parameters
     ----------
@@ -147,46 +164,60 @@ def _override_ignore_patterns(ignore_patterns: list[str], include_patterns: list
     List[str]
         A new list of ignore_patterns with specified patterns removed.
     """
-    return list(set(ignore_patterns) - set(include_patterns))
+    include_set = set(include_patterns)
+    return [pattern for pattern in ignore_patterns if pattern not in include_set]
 
-def extract_valid_url(source: str) -> Union[str, None]:
+def extract_valid_url(source: str) -> tuple[Union[str, None], bool]:
     """
     Extract and validate a valid URL from the given source.
 
+    Results are cached per source string, repeated queries on the same source skip the regex work.
+
     Args:
         source (str): The source string containing a potential URL.
 
     Returns:
-        Union[str, None]: A valid URL if found, otherwise None.
+        tuple[Union[str, None], bool]: A valid URL if found, otherwise None, and whether the source
+        looks like a URL (starts with http:// or https://, or mentions github.com) even if none was found.
+    """
+    url, looks_like_url = _extract_valid_url(source)
+    if url and VERBOSE:
+        print(f"\n🔧 Extracted URL: {url}")
+    return url, looks_like_url
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_valid_url(source: str) -> tuple[Union[str, None], bool]:
+    """
+    Extract a valid URL from the given source, see extract_valid_url.
     """
     # First, clean and unquote the source
     source = unquote(source).strip()
-    
+    looks_like_url = source.startswith(('http://', 'https://')) or 'github.com' in source
+
+    # Both GitHub patterns match against '/' separators, only Windows-style sources need a copy
+    normalized = source.replace('\\', '/') if '\\' in source else source
+
     # Direct match for full GitHub URLs
-    github_match = re.match(r'^(https?://)?github\.com/[\w-]+/[\w-]+(/.*)?$', source.replace('\\', '/'))
+    github_match = _GITHUB_URL_RE.match(normalized)
     if github_match:
         # Ensure https:// prefix
-        url = f"https://{github_match.group(0)}" if not source.startswith('http') else source
-        print(f"\n🔧 Extracted GitHub URL: {url}")
-        return url
+        return f"https://{github_match.group(0)}" if not source.startswith('http') else source, True
 
     # Handle Windows-style paths that contain GitHub URL
-    path_url_match = re.search(r'github\.com[/\\][\w-]+[/\\][\w-]+', source.replace('\\', '/'))
+    path_url_match = _GITHUB_PATH_RE.search(normalized)
     if path_url_match:
-        url = f"https://{path_url_match.group(0).replace('\\', '/')}"
-        print(f"\n🔧 Extracted URL from path: {url}")
-        return url
+        return f"https://{path_url_match.group(0)}", True
 
     # Fallback regex-based extraction
-    match = re.search(r'https?://[^\s]+', source)
+    match = _HTTP_URL_RE.search(source)
     if match:
         extracted_url = match.group(0)
         parsed_url = urlparse(extracted_url)
         if parsed_url.scheme and parsed_url.netloc:
-            print(f"\n🔧 Extracted valid URL: {extracted_url}")
-            return extracted_url
+            return extracted_url, True
 
-    return None
+    return None, looks_like_url
 
 
 def parse_query(
@@ -198,74 +229,77 @@ def parse_query(
 ) -> dict[str, Any]:
     """Parse the query and apply ignore patterns."""
     
-    # Step 1: Extract a valid URL 
-    valid_url = extract_valid_url(source)
+    # Step 1: Extract a valid URL, plain local paths can't contain one and skip the regex work.
+    # extract_valid_url only finds URLs containing "github.com" or "://", possibly percent-encoded.
+    if from_web or "github.com" in source or "://" in source or "%" in source:
+        valid_url, looks_like_url = extract_valid_url(source)
+    else:
+        valid_url, looks_like_url = None, False
     
     if valid_url:
-        print(f"\n🌐 Detected valid web URL: {valid_url}")
+        if VERBOSE:
+            print(f"\n🌐 Detected valid web URL: {valid_url}")
         is_web = True
         source = valid_url
     else:
-        print(f"\n📂 Detected local path: {source}")
-        is_web = from_web or source.startswith(('http://', 'https://')) or 'github.com' in source
+        if VERBOSE:
+            print(f"\n📂 Detected local path: {source}")
+        is_web = from_web or looks_like_url
 
     # Step 2: Handle Web URLs
     if is_web:
-        print(f"\n🌐 Processing web URL: {source}")
+        if VERBOSE:
+            print(f"\n🌐 Processing web URL: {source}")
         query = _parse_url(source)
         
-        # Start with default ignore patterns
-        final_ignore_patterns = DEFAULT_IGNORE_PATTERNS.copy()
-
-        # Add user-defined ignore patterns if provided
-        if ignore_patterns:
-            parsed_ignore = _parse_patterns(ignore_patterns)
-            final_ignore_patterns.extend(parsed_ignore)
+        # Default ignore patterns followed by the user-defined ones, built in a single list
+        parsed_ignore = _parse_patterns(ignore_patterns) if ignore_patterns else []
+        final_ignore_patterns = [*DEFAULT_IGNORE_PATTERNS, *parsed_ignore]
 
         query.update({
             "max_file_size": max_file_size,
             "ignore_patterns": final_ignore_patterns,
             "include_patterns": _parse_patterns(include_patterns) if include_patterns else None
         })
-        print(f"✅ Successfully parsed web URL: {query['url']}")
+        if VERBOSE:
+            print(f"✅ Successfully parsed web URL: {query['url']}")
         return query
 
     # Step 3: Handle Local Paths
-    source_path = os.path.abspath(os.path.normpath(source))
+    # abspath normalizes the path itself and only looks up the working directory for relative paths
+    source_path = os.path.abspath(source)
     query = {
         "local_path": source_path,
         "slug": os.path.basename(source_path),
         "subpath": "/",
-        "id": str(uuid.uuid4()),
+        "id": os.urandom(16).hex(),
         "url": None,
     }
 
-    final_ignore_patterns = DEFAULT_IGNORE_PATTERNS.copy()
-
     # Check .gitignore only for local paths
     gitignore_path = os.path.join(source_path, '.gitignore')
-    print(f"\n🔍 Looking for .gitignore at: {gitignore_path}")
-    
-    if os.path.exists(gitignore_path):
-        print(f"✅ Found .gitignore file")
-        gitignore_patterns = parse_gitignore(gitignore_path)
-        if gitignore_patterns:
-            final_ignore_patterns.extend(gitignore_patterns)
-            print("\n🔧 Added patterns from .gitignore")
-    else:
-        print("❌ No .gitignore file found")
+    if VERBOSE:
+        print(f"\n🔍 Looking for .gitignore at: {gitignore_path}")
 
-    # Add user-defined ignore patterns
-    if ignore_patterns:
-        parsed_ignore = _parse_patterns(ignore_patterns)
-        final_ignore_patterns.extend(parsed_ignore)
+    # A missing .gitignore yields no patterns, its stat in parse_gitignore doubles as the existence check
+    gitignore_patterns = parse_gitignore(gitignore_path)
+    if gitignore_patterns and VERBOSE:
+        print("\n🔧 Added patterns from .gitignore")
 
+    # Default, .gitignore and user-defined ignore patterns, in that order
+    parsed_ignore = _parse_patterns(ignore_patterns) if ignore_patterns else []
+    default_patterns = DEFAULT_IGNORE_PATTERNS
+    extra_patterns = [*gitignore_patterns, *parsed_ignore]
 
-    # Handle include patterns
+    # Handle include patterns, the defaults are only filtered when an include pattern names one of them
     parsed_include = None
     if include_patterns:
         parsed_include = _parse_patterns(include_patterns)
-        final_ignore_patterns = _override_ignore_patterns(final_ignore_patterns, parsed_include)
+        if not _DEFAULT_IGNORE_FROZENSET.isdisjoint(parsed_include):
+            default_patterns = _override_ignore_patterns(default_patterns, parsed_include)
+        extra_patterns = _override_ignore_patterns(extra_patterns, parsed_include)
+
+    final_ignore_patterns = [*default_patterns, *extra_patterns]
 
     # Update query
     query.update({
@@ -280,48 +314,78 @@ def parse_query(
 
 
 ### 📝 **Parse .gitignore**
+# Patterns a directory line of a .gitignore file expands to
+_GITIGNORE_DIR_TEMPLATES = ("{}", "{}/**", "**/{}", "**/{}/**")
+
+# Parsed .gitignore patterns per path, with the modification time and size they were parsed at
 def parse_gitignore(gitignore_path: str) -> list[str]:
     """
     Parse .gitignore and return ignore patterns.
+
+    Parsed patterns are cached per path, modification time and size, so repeated queries on the same tree don't
+    re-read the file and an edited file is read again. The cache is bounded, entries for temporary clones age out.
+    A fresh list is returned on every call.
     """
-    ignore_patterns = []
-    print(f"\n📂 Attempting to read .gitignore from: {gitignore_path}")
-    
-    if not os.path.exists(gitignore_path):
-        print(f"❌ .gitignore not found at: {gitignore_path}")
-        return ignore_patterns
+    try:
+        st = os.stat(gitignore_path)
+    except OSError:
+        if VERBOSE:
+            print("❌ No .gitignore file found")
+        return []
+
+    return list(_read_gitignore(gitignore_path, st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=128)
+def _read_gitignore(gitignore_path: str, mtime_ns: int, size: int) -> tuple[str, ...]:
+    """
+    Read and parse a .gitignore file, see parse_gitignore. The modification time and size only key the cache.
+    """
+    if VERBOSE:
+        print(f"\n📂 Attempting to read .gitignore from: {gitignore_path}")
 
     try:
         with open(gitignore_path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        if VERBOSE:
             print("✅ Successfully opened .gitignore")
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    print(f"📌 Processing line: {line}")
-                    if line.endswith('/'):
-                        # For directory patterns (like logs/, backup/, etc)
-                        base = line.rstrip('/')
-                        patterns = [
-                            f"{base}",  # Match directory itself
-                            f"{base}/**",  # Match all contents
-                            f"**/{base}",  # Match directory in subdirectories
-                            f"**/{base}/**"  # Match contents in subdirectories
-                        ]
-                        ignore_patterns.extend(patterns)
-                    else:
-                        # Handle file patterns
-                        ignore_patterns.append(line)
-                        if '.' not in line and not line.endswith('/'):
-                            ignore_patterns.append(f"{line}/")
-                            
     except Exception as e:
         print(f"❌ Error reading .gitignore: {str(e)}")
-        return []
-
-    # Remove duplicates while preserving order
-    list_ignore_patterns = list(dict.fromkeys(ignore_patterns))
-    print("\n📋 Parsed ignore patterns from .gitignore:")
-    for pattern in list_ignore_patterns:
-        print(f"  - {pattern}")
+        return ()
+
+    lines = [line for line in map(str.strip, text.splitlines()) if line and line[0] != '#']
+    if VERBOSE:
+        for line in lines:
+            print(f"📌 Processing line: {line}")
+
+    expanded = [pattern for line in lines for pattern in _expand_gitignore_line(line)]
+
+    # The last matching pattern wins once negations are involved, so order is kept and a repeated
+    # pattern stays where it last occurs: deduplicate from the end, then restore the file order
+    unique_patterns = tuple(reversed(dict.fromkeys(reversed(expanded))))
+    if VERBOSE:
+        print("\n📋 Parsed ignore patterns from .gitignore:")
+        for pattern in unique_patterns:
+            print(f"  - {pattern}")
     
-    return list_ignore_patterns
+    return unique_patterns
+
+
+def _expand_gitignore_line(line: str) -> tuple[str, ...]:
+    """Expands a .gitignore line into the patterns it stands for."""
+    # Negated lines expand like the pattern they negate
+    if line[0] == '!':
+        return tuple(f"!{pattern}" for pattern in _expand_gitignore_line(line[1:])) if line[1:] else ()
+
+    if line[-1] == '/':
+        # For directory patterns (like logs/, backup/, etc): the directory itself, its contents,
+        # and the same in subdirectories
+        base = line.rstrip('/')
+        return tuple(template.format(base) for template in _GITIGNORE_DIR_TEMPLATES)
+
+    if '.' not in line:
+        # Extensionless file patterns may also name a directory
+        return (line, f"{line}/")
+
+    # Handle file patterns
+    return (line,)
@@ -0,0 +1,32 @@
+import os
+import subprocess
+from collections.abc import Callable
+
+import pytest
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+@pytest.fixture
+def git() -> Callable[..., str]:
+    """Runs a git command with a fixed identity and no user configuration, returns its stdout."""
+
+    def run(*args: str, cwd=None) -> str:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            env={**os.environ, **_GIT_ENV},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout
+
+    return run
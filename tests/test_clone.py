@@ -0,0 +1,161 @@
+import asyncio
+import os
+
+import pytest
+
+from gitingest_lite import clone
+from gitingest_lite.ingest_from_query import _compile_patterns, _matches
+from gitingest_lite.parse_query import _parse_patterns
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch) -> str:
+    monkeypatch.setattr(clone, "MIRROR_CACHE_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "url, rel_path",
+    [
+        ("https://github.com/user/repo", "github.com/user/repo.git"),
+        ("https://github.com/user/repo.git", "github.com/user/repo.git"),
+        ("https://token@git.example.com:8443/group/sub/repo", "git.example.com_8443/group/sub/repo.git"),
+    ],
+)
+def test_mirror_path_is_keyed_by_host_and_path(cache_dir: str, url: str, rel_path: str) -> None:
+    assert clone._mirror_path(url) == os.path.join(cache_dir, *rel_path.split("/"))
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/user/../../etc",
+        "https://example.com/user/./repo",
+        "https://example.com/user//repo",
+        "https://example.com/",
+        "https://example.com/user\\..\\..\\repo",
+        "https://example.com:port/user/repo",
+    ],
+)
+def test_mirror_path_rejects_unsafe_urls(cache_dir: str, url: str) -> None:
+    assert clone._mirror_path(url) is None
+
+
+_REPO_FILES = [
+    "README.md",
+    "setup.py",
+    "src/app.py",
+    "src/pkg/mod.py",
+    "src/pkg/data.json",
+    "src/docs/api.md",
+    "docs/index.md",
+    "docs/guide/intro.md",
+    "tests/test_app.py",
+    "tests/unit/test_mod.py",
+    "lib/src/other.py",
+]
+
+
+@pytest.fixture
+def bare_repo(tmp_path, git, monkeypatch) -> dict[str, str]:
+    """A bare repository served over file://, with a commit on main and a second one on dev."""
+    work = tmp_path / "work"
+    work.mkdir()
+    git("init", "-q", "-b", "main", cwd=work)
+    for name in _REPO_FILES:
+        (work / name).parent.mkdir(parents=True, exist_ok=True)
+        (work / name).write_text(f"{name}\n")
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "initial", cwd=work)
+    commit = git("rev-parse", "HEAD", cwd=work).strip()
+    git("checkout", "-q", "-b", "dev", cwd=work)
+    (work / "src" / "dev.py").write_text("dev\n")
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "dev", cwd=work)
+    git("checkout", "-q", "main", cwd=work)
+    git("clone", "-q", "--bare", str(work), str(tmp_path / "repo.git"))
+
+    async def exists(url: str) -> bool:
+        return True
+
+    monkeypatch.setattr(clone, "_check_repo_exists", exists)
+    monkeypatch.setattr(clone, "MIRROR_CACHE_DIR", None)
+    return {"url": (tmp_path / "repo.git").as_uri(), "commit": commit}
+
+
+def _checked_out(path) -> set[str]:
+    return {
+        os.path.relpath(os.path.join(root, name), path).replace(os.sep, "/")
+        for root, dirs, files in os.walk(path)
+        if ".git" not in os.path.relpath(root, path).split(os.sep)
+        for name in files
+    }
+
+
+def _selected(files: set[str], include: list[str], subpath: str = "/") -> set[str]:
+    """Files an ingest with the include patterns keeps, relative to the subpath like _scan_directory matches them."""
+    matcher = _compile_patterns(include)
+    prefix = subpath.strip("/") + "/" if subpath != "/" else ""
+    return {
+        name for name in files
+        if name.startswith(prefix) and _matches(name[len(prefix):], matcher)
+    }
+
+
+def _clone(bare_repo, tmp_path, **kwargs) -> set[str]:
+    local_path = tmp_path / "clone"
+    asyncio.run(clone.clone_repo(clone.CloneConfig(url=bare_repo["url"], local_path=str(local_path), **kwargs)))
+    return _checked_out(local_path)
+
+
+@pytest.mark.parametrize("scenario", ["default", "branch", "commit"])
+def test_sparse_checkout_fills_the_working_tree(bare_repo, tmp_path, scenario: str) -> None:
+    kwargs = {"branch": "dev"} if scenario == "branch" else {"commit": bare_repo["commit"]} if scenario == "commit" else {}
+
+    files = _clone(bare_repo, tmp_path, sparse_patterns=["*.py"], **kwargs)
+
+    expected = {name for name in _REPO_FILES if name.endswith(".py")}
+    if scenario == "branch":
+        expected.add("src/dev.py")
+    assert files == expected
+
+
+@pytest.mark.parametrize(
+    "include, subpath",
+    [
+        ("*.py", "/"),
+        ("setup.py", "/"),
+        ("src/*.py", "/"),
+        ("src/**/*.py", "/"),
+        ("docs/", "/"),
+        ("docs", "/"),
+        ("tests/**/test_*.py", "/"),
+        ("*.md", "/src"),
+        ("pkg/*.json", "/src"),
+        ("docs/", "/src"),
+        ("pkg/", "/src"),
+    ],
+)
+def test_sparse_checkout_keeps_every_included_file(bare_repo, tmp_path, include: str, subpath: str) -> None:
+    # Include patterns go through _parse_patterns first, like parse_query does, e.g. "docs/" becomes "docs/*"
+    patterns = _parse_patterns(include)
+
+    files = _clone(bare_repo, tmp_path, sparse_patterns=patterns, subpath=subpath)
+
+    expected = _selected(set(_REPO_FILES), patterns, subpath)
+    assert expected
+    assert _selected(files, patterns, subpath) == expected
+    assert files < set(_REPO_FILES)
+
+
+def test_sparse_checkout_falls_back_to_all_files(bare_repo, tmp_path, monkeypatch) -> None:
+    run_git_command = clone._run_git_command
+
+    async def without_sparse_checkout(*args: str) -> tuple[bytes, bytes]:
+        if "sparse-checkout" in args:
+            raise RuntimeError("error: unknown option `no-cone'")
+        return await run_git_command(*args)
+
+    monkeypatch.setattr(clone, "_run_git_command", without_sparse_checkout)
+
+    assert _clone(bare_repo, tmp_path, sparse_patterns=["*.py"]) == set(_REPO_FILES)
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from gitingest_lite.constant import TMP_BASE_PATH
+from gitingest_lite.parse_query import parse_query
+
+_COMMIT = "a" * 40
+
+
+@pytest.mark.parametrize(
+    "source, url, slug, branch, commit, subpath",
+    [
+        # github.com fast path
+        ("https://github.com/user/repo", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("http://github.com/user/repo", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("github.com/user/repo", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("https://github.com/user/repo.git", "https://github.com/user/repo.git", "user-repo.git", None, None, "/"),
+        ("https://github.com/user/repo?tab=readme", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("https://github.com/user/repo#readme", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("https://github.com/user/repo/tree/dev/src/pkg?x=1#top", "https://github.com/user/repo", "user-repo", "dev", None, "/src/pkg"),
+        (f"https://github.com/user/repo/tree/{_COMMIT}/src", "https://github.com/user/repo", "user-repo", None, _COMMIT, "/src"),
+        ("https://github.com/user/repo/issues/1", "https://github.com/user/repo", "user-repo", None, None, "/"),
+        ("https://github.com/user/repo%2Dx", "https://github.com/user/repo-x", "user-repo-x", None, None, "/"),
+        # Other hosts go through urlparse and keep their scheme
+        ("https://gitlab.com/group/repo", "https://gitlab.com/group/repo", "group-repo", None, None, "/"),
+        ("http://gitlab.com/group/repo.git", "http://gitlab.com/group/repo.git", "group-repo.git", None, None, "/"),
+        ("https://gitlab.com/group/repo?x=1#y", "https://gitlab.com/group/repo", "group-repo", None, None, "/"),
+        ("https://gitlab.com/group/repo/tree/main/docs", "https://gitlab.com/group/repo", "group-repo", "main", None, "/docs"),
+    ],
+)
+def test_parse_query_url(source: str, url: str, slug: str, branch, commit, subpath: str) -> None:
+    query = parse_query(source, 1024, from_web=False)
+
+    assert query["url"] == url
+    assert query["slug"] == slug
+    assert f"{query['user_name']}-{query['repo_name']}" == slug
+    assert query["branch"] == branch
+    assert query["commit"] == commit
+    assert query["subpath"] == subpath
+    assert query["local_path"] == os.path.join(TMP_BASE_PATH, query["id"], slug)
+
+
+def test_parse_query_ids_are_unique() -> None:
+    first = parse_query("https://github.com/user/repo", 1024, from_web=False)
+    second = parse_query("https://github.com/user/repo", 1024, from_web=False)
+
+    assert len(first["id"]) == 32
+    assert first["id"] != second["id"]
+
+
+@pytest.mark.parametrize("source", ["https://github.com/user", "github.com/user"])
+def test_parse_query_rejects_urls_without_repository(source: str) -> None:
+    with pytest.raises(ValueError, match="Invalid repository URL"):
+        parse_query(source, 1024, from_web=False)
+
+
+def test_parse_query_local_path(tmp_path) -> None:
+    query = parse_query(str(tmp_path), 1024, from_web=False)
+
+    assert query["url"] is None
+    assert query["local_path"] == str(tmp_path)
+    assert query["slug"] == tmp_path.name
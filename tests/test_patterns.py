@@ -0,0 +1,104 @@
+import pytest
+
+from gitingest_lite.ingest_from_query import _compile_patterns, _matches
+
+
+def _match(patterns: list[str], rel_path: str) -> bool:
+    matcher = _compile_patterns(patterns)
+    return matcher is not None and _matches(rel_path, matcher)
+
+
+@pytest.mark.parametrize(
+    "rel_path, expected",
+    [
+        ("main.py", True),
+        ("src/main.py", True),
+        ("src/deep/main.py", True),
+        ("main.pyc", False),
+        ("main.txt", False),
+    ],
+)
+def test_pattern_without_slash_matches_at_any_depth(rel_path: str, expected: bool) -> None:
+    assert _match(["*.py"], rel_path) is expected
+
+
+@pytest.mark.parametrize(
+    "rel_path, expected",
+    [
+        ("src/main.py", True),
+        ("lib/src/main.py", False),
+        ("src/deep/main.py", False),
+    ],
+)
+def test_pattern_with_slash_is_anchored(rel_path: str, expected: bool) -> None:
+    assert _match(["src/*.py"], rel_path) is expected
+
+
+def test_leading_slash_is_anchored() -> None:
+    assert _match(["/build"], "build/")
+    assert not _match(["/build"], "src/build/")
+
+
+@pytest.mark.parametrize(
+    "pattern, rel_path, expected",
+    [
+        ("**/test", "test/", True),
+        ("**/test", "a/b/test/", True),
+        ("src/**/test.py", "src/test.py", True),
+        ("src/**/test.py", "src/a/b/test.py", True),
+        ("src/**/test.py", "lib/src/a/test.py", False),
+        ("docs/**", "docs/a/b.md", True),
+        ("docs/**", "src/docs/b.md", False),
+    ],
+)
+def test_double_star_spans_directories(pattern: str, rel_path: str, expected: bool) -> None:
+    assert _match([pattern], rel_path) is expected
+
+
+def test_trailing_slash_only_matches_directories() -> None:
+    assert _match(["logs/"], "logs/")
+    assert _match(["logs/"], "app/logs/")
+    assert not _match(["logs/"], "logs")
+
+
+def test_no_patterns_compile_to_none() -> None:
+    assert _compile_patterns(None) is None
+    assert _compile_patterns([]) is None
+
+
+def test_literal_prefilter_does_not_reject_matches() -> None:
+    # "*" has no literal, so the prefilter must be disabled rather than rejecting every path
+    assert _match(["*.md", "*"], "anything")
+    assert _compile_patterns(["*.md", "*"])[1] is None
+
+
+@pytest.mark.parametrize(
+    "patterns, rel_path, expected",
+    [
+        (["*.log", "!important.log"], "debug.log", True),
+        (["*.log", "!important.log"], "important.log", False),
+        (["*.log", "!important.log"], "logs/important.log", False),
+        # The last matching pattern wins, a pattern after the negation matches again
+        (["*.log", "!important.log", "important.log"], "important.log", True),
+        (["*.log", "!important.log", "important.log"], "debug.log", True),
+        (["*.log", "!*.log", "debug.log"], "debug.log", True),
+        (["*.log", "!*.log", "debug.log"], "other.log", False),
+    ],
+)
+def test_negation_last_match_wins(patterns: list[str], rel_path: str, expected: bool) -> None:
+    assert _match(patterns, rel_path) is expected
+
+
+def test_negation_only_affects_earlier_patterns() -> None:
+    patterns = ["*.tmp", "!keep.tmp", "logs/"]
+    assert _match(patterns, "a.tmp")
+    assert not _match(patterns, "keep.tmp")
+    assert _match(patterns, "logs/")
+
+
+def test_leading_negation_is_ignored() -> None:
+    # Nothing is matched yet, so a negation before any positive pattern has no effect
+    assert _compile_patterns(["!important.log"]) is None
+    assert _match(["!important.log", "*.log"], "important.log")
+    assert _match(["!important.log", "*.log"], "debug.log")
+    assert not _match(["!important.log", "*.log"], "notes.txt")
@@ -0,0 +1,42 @@
+import os
+import stat
+
+from gitingest_lite.ingest import set_writable_permissions
+
+
+def _mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_set_writable_permissions_keeps_executable_bits(tmp_path) -> None:
+    script = tmp_path / "run.sh"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o500)
+    data = tmp_path / "sub" / "data.txt"
+    data.parent.mkdir()
+    data.write_text("data")
+    data.chmod(0o400)
+
+    set_writable_permissions(tmp_path)
+
+    assert _mode(script) == 0o766
+    assert _mode(data) == 0o666
+    assert _mode(data.parent) == 0o777
+
+
+def test_set_writable_permissions_leaves_symlink_targets_alone(tmp_path) -> None:
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    secret = outside / "secret"
+    secret.write_text("secret")
+    secret.chmod(0o600)
+    outside.chmod(0o700)
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "file_link").symlink_to(secret)
+    (tree / "dir_link").symlink_to(outside, target_is_directory=True)
+
+    set_writable_permissions(tree)
+
+    assert _mode(secret) == 0o600
+    assert _mode(outside) == 0o700
@@ -0,0 +1,168 @@
+import os
+
+import pytest
+
+from gitingest_lite import ingest_from_query as ingest_from_query_module
+from gitingest_lite.ingest_from_query import _list_tracked_files, ingest_from_query
+from gitingest_lite.parse_query import parse_query
+
+
+def _ingest(path, url: str | None = None) -> tuple[str, str]:
+    query = parse_query(str(path), 10 * 1024 * 1024, False)
+    query["url"] = url
+    _, tree, content = ingest_from_query(query, estimate_tokens=False)
+    return tree, content
+
+
+@pytest.fixture
+def tracked_repo(tmp_path, git):
+    """
+    A repository with regular files, a tracked symlink to a directory, a symlink loop,
+    a submodule and a file skipped by the sparse checkout.
+    """
+    repo = tmp_path / "repo"
+    (repo / "src" / "deep").mkdir(parents=True)
+    (repo / "a.txt").write_text("a\n")
+    (repo / "src" / "b.py").write_text("b\n")
+    (repo / "src" / "deep" / "c.py").write_text("c\n")
+    (repo / "skipped.txt").write_text("skipped\n")
+    (repo / "link").symlink_to("src", target_is_directory=True)
+    (repo / "loop").symlink_to(".", target_is_directory=True)
+    git("init", "-q", cwd=repo)
+    git("add", "-A", cwd=repo)
+    git("commit", "-q", "-m", "initial", cwd=repo)
+
+    # A submodule is a gitlink entry, checked out as an empty directory until it is initialized
+    head = git("rev-parse", "HEAD", cwd=repo).strip()
+    git("update-index", "--add", "--cacheinfo", f"160000,{head},ext/sub", cwd=repo)
+    (repo / "ext" / "sub").mkdir(parents=True)
+
+    # Files outside a sparse checkout stay in the index with the skip-worktree bit, git ls-files -t tags them "S"
+    git("update-index", "--skip-worktree", "skipped.txt", cwd=repo)
+    (repo / "skipped.txt").unlink()
+    return repo
+
+
+def test_list_tracked_files(tracked_repo) -> None:
+    root = str(tracked_repo)
+    listing = _list_tracked_files(root)
+
+    assert listing is not None
+    assert [entry.name for entry in listing[root]] == ["a.txt", "ext", "link", "loop", "src"]
+    entries = {entry.name: entry for entry in listing[root]}
+    assert entries["a.txt"].is_file() and not entries["a.txt"].is_dir()
+    assert entries["link"].is_symlink() and entries["link"].is_dir()
+    assert entries["src"].is_dir() and not entries["src"].is_symlink()
+    assert entries["a.txt"].stat().st_size == 2
+
+    src = os.path.join(root, "src")
+    assert [entry.name for entry in listing[src]] == ["b.py", "deep"]
+    assert [entry.name for entry in listing[os.path.join(src, "deep")]] == ["c.py"]
+
+    sub = os.path.join(root, "ext", "sub")
+    assert [entry.name for entry in listing[os.path.join(root, "ext")]] == ["sub"]
+    assert listing[os.path.join(root, "ext")][0].is_dir()
+    assert listing[sub] == []
+
+    # Symlinked directories have no entries of their own in the index
+    assert os.path.join(root, "link") not in listing
+
+
+def test_list_tracked_files_outside_a_work_tree(tmp_path) -> None:
+    assert _list_tracked_files(str(tmp_path)) is None
+
+
+def test_tracked_listing_matches_the_file_system_walk(tracked_repo) -> None:
+    walked = _ingest(tracked_repo)
+    tracked = _ingest(tracked_repo, url="https://github.com/user/repo")
+
+    assert tracked == walked
+    tree, content = walked
+    # The symlinked directory is listed, the loop back to the root is not walked again
+    assert "link/" in tree and "File: /link/deep/c.py" in content.replace(os.sep, "/")
+    assert "sub/" in tree
+    assert "skipped.txt" not in tree
+
+
+@pytest.fixture
+def tree_with_locked_dir(tmp_path):
+    root = tmp_path / "tree"
+    (root / "locked").mkdir(parents=True)
+    (root / "locked" / "secret.txt").write_text("secret\n")
+    (root / "open").mkdir()
+    (root / "open" / "b.txt").write_text("b\n")
+    (root / "a.txt").write_text("a\n")
+    (root / "z.txt").write_text("z\n")
+    return root
+
+
+@pytest.mark.parametrize("use_dir_fd", [True, False])
+def test_walk_skips_unreadable_directory(tree_with_locked_dir, monkeypatch, capsys, use_dir_fd: bool) -> None:
+    # Root can read any directory, so the permission error is raised by the listing calls instead of chmod
+    real_open, real_scandir = os.open, os.scandir
+
+    def locked_open(path, *args, **kwargs):
+        if os.path.basename(os.fspath(path)) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return real_open(path, *args, **kwargs)
+
+    def locked_scandir(path="."):
+        if isinstance(path, str) and os.path.basename(path) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(ingest_from_query_module, "_USE_DIR_FD", use_dir_fd)
+    monkeypatch.setattr(os, "open", locked_open)
+    monkeypatch.setattr(os, "scandir", locked_scandir)
+
+    tree, content = _ingest(tree_with_locked_dir)
+
+    assert f"Permission denied: {tree_with_locked_dir / 'locked'}" in capsys.readouterr().out
+    assert "secret" not in content
+    for name in ("a.txt", "b.txt", "z.txt"):
+        assert name in tree
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() == 0, reason="root can read any directory")
+def test_walk_skips_directory_without_read_permission(tree_with_locked_dir) -> None:
+    locked = tree_with_locked_dir / "locked"
+    locked.chmod(0)
+    try:
+        tree, content = _ingest(tree_with_locked_dir)
+    finally:
+        locked.chmod(0o755)
+
+    assert "secret" not in content
+    assert "z.txt" in tree
+
+
+@pytest.mark.parametrize("use_dir_fd", [True, False])
+def test_walk_lists_nested_directories(tree_with_locked_dir, monkeypatch, use_dir_fd: bool) -> None:
+    monkeypatch.setattr(ingest_from_query_module, "_USE_DIR_FD", use_dir_fd)
+
+    tree, content = _ingest(tree_with_locked_dir)
+
+    assert tree.index("a.txt") < tree.index("locked/") < tree.index("secret.txt") < tree.index("open/") < tree.index("z.txt")
+    assert "File: /locked/secret.txt" in content.replace(os.sep, "/")
+
+
+@pytest.mark.parametrize("use_dir_fd", [True, False])
+def test_walk_skips_symlinks_outside_the_tree(tmp_path, monkeypatch, use_dir_fd: bool) -> None:
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("outside secret\n")
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "inner.txt").write_text("inner\n")
+    (root / "file_in").symlink_to(root / "sub" / "inner.txt")
+    (root / "dir_in").symlink_to("sub", target_is_directory=True)
+    (root / "file_out").symlink_to(outside / "secret.txt")
+    (root / "dir_out").symlink_to(outside, target_is_directory=True)
+    monkeypatch.setattr(ingest_from_query_module, "_USE_DIR_FD", use_dir_fd)
+
+    tree, content = _ingest(root)
+
+    assert "file_in" in tree and "dir_in/" in tree
+    assert "File: /dir_in/inner.txt" in content.replace(os.sep, "/")
+    assert "file_out" not in tree and "dir_out" not in tree
+    assert "outside secret" not in content